@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel, Field
+from typing import List, Optional
 from prometheus_fastapi_instrumentator import Instrumentator
 from contextlib import asynccontextmanager
 import uvicorn
@@ -7,6 +8,8 @@ import redis
 import json
 import os
 import sys
+import time
+import uuid
 import numpy as np
 
 # --- MODULE PATH SETTING ---
@@ -16,13 +19,16 @@ sys.path.append(project_root)
 
 from src.pipelines.inference_pipeline import InferencePipeline
 from src.utils.common import read_config
-from src.utils.logger import logger
+from src.utils.logger import logger, request_logger, request_id_var
 
 # --- GLOBAL VARIABLES ---
 ml_pipeline = None
 redis_client = None
 config = read_config("config/config.yaml")
 
+# Redis TTL for cached searches, also advertised to clients via Cache-Control.
+CACHE_TTL_SECONDS = 3600
+
 # --- JSON FIX FOR NUMPY (CRITICAL FOR STABILITY) ---
 class NpEncoder(json.JSONEncoder):
     """
@@ -83,10 +89,123 @@ app = FastAPI(
 Instrumentator().instrument(app).expose(app)
 
 
+# --- REQUEST ID (attached to every log record of the request) ---
+@app.middleware("http")
+async def add_request_id(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 # --- Pydantic Models ---
 class SearchRequest(BaseModel):
     text: str = Field(..., min_length=2, example="Black leather jacket")
     top_k: int = Field(5, ge=1, le=20, example=5)
+    # Optional diversity re-ranking (defaults come from config.yaml 'reranking')
+    diversify: Optional[bool] = None
+    oversample: Optional[int] = Field(None, ge=1, le=10)
+    diversity_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)
+
+
+class BatchSearchRequest(BaseModel):
+    requests: List[SearchRequest] = Field(..., min_length=1, max_length=32)
+
+
+# --- HELPERS ---
+def build_cache_key(request: SearchRequest):
+    normalized_text = request.text.lower().strip()
+    cache_key = f"search:{normalized_text}:{request.top_k}"
+    if request.diversify is not None or request.oversample or request.diversity_lambda is not None:
+        cache_key += f":{request.diversify}:{request.oversample}:{request.diversity_lambda}"
+    return cache_key
+
+
+def read_cache(request: SearchRequest):
+    """
+    Returns (cached response, remaining TTL in seconds), or (None, 0) on a cache miss.
+    """
+    if not redis_client:
+        return None, 0
+
+    start_time = time.perf_counter()
+    cache_key = build_cache_key(request)
+    # GET + TTL in one round trip
+    pipe = redis_client.pipeline()
+    pipe.get(cache_key)
+    pipe.ttl(cache_key)
+    cached_result, ttl = pipe.execute()
+    if not cached_result:
+        return None, 0
+
+    request_logger.info("recommend", extra={
+        "query": request.text.lower().strip(),
+        "top_k": request.top_k,
+        "cache": "hit",
+        "duration_ms": round((time.perf_counter() - start_time) * 1000, 3)
+    })
+    return json.loads(cached_result), max(ttl, 0)
+
+
+def search_and_cache(request: SearchRequest, query_vector=None):
+    """
+    Runs the Vector Search Pipeline (cache miss) and stores the response in Redis.
+    """
+    start_time = time.perf_counter()
+
+    results = ml_pipeline.search_products(
+        request.text,
+        top_k=request.top_k,
+        diversify=request.diversify,
+        oversample=request.oversample,
+        diversity_lambda=request.diversity_lambda,
+        query_vector=query_vector
+    )
+
+    # Let's add source tags to the results.
+    final_response = {
+        "results": results,
+        "source": "vector_db",
+        "count": len(results)
+    }
+
+    if redis_client and results:
+        cache_data = final_response.copy()
+        cache_data["source"] = "redis_cache"
+
+        # Keep in cache for 1 hour (3600 seconds)
+        redis_client.setex(build_cache_key(request), CACHE_TTL_SECONDS, json.dumps(cache_data, cls=NpEncoder))
+
+    request_logger.info("recommend", extra={
+        "query": request.text.lower().strip(),
+        "top_k": request.top_k,
+        "cache": "miss",
+        "duration_ms": round((time.perf_counter() - start_time) * 1000, 3)
+    })
+    return final_response
+
+
+def cached_search(request: SearchRequest):
+    """
+    Runs a single search through the Redis cache and the Vector Search Pipeline.
+    Returns (response, max-age): a cache hit is only fresh for the key's remaining TTL.
+    """
+    cached_result, ttl = read_cache(request)
+    if cached_result is not None:
+        return cached_result, ttl
+    return search_and_cache(request), CACHE_TTL_SECONDS
+
+
+def ensure_pipeline_ready():
+    """
+    Returns 503 while the model is still loading so clients know to retry.
+    """
+    if ml_pipeline is None:
+        raise HTTPException(status_code=503, detail="Model is not ready yet. Please retry.")
 
 
 # --- ENDPOINTS ---
@@ -103,45 +222,53 @@ def home():
 
 
 @app.post("/recommend")
-def recommend_products(request: SearchRequest):
+def recommend_products(request: SearchRequest, response: Response):
     """
     Returns similar products using Redis Caching + Vector Search Pipeline.
     """
+    ensure_pipeline_ready()
     try:
-        # --- 1. REDIS CACHE CONTROL ---
-        normalized_text = request.text.lower().strip()
-        cache_key = f"search:{normalized_text}:{request.top_k}"
-
-        if redis_client:
-            cached_result = redis_client.get(cache_key)
-            if cached_result:
-                logger.info(f"⚡ CACHE HIT for '{normalized_text}'")
-                return json.loads(cached_result)
+        final_response, max_age = cached_search(request)
+        # TTL hint for client-side caches (see src/client/api_client.py)
+        response.headers["Cache-Control"] = f"max-age={max_age}"
+        return final_response
 
-        # --- 2. PIPELINE CALL (CACHE MISS) ---
-        logger.info(f"CACHE MISS. Asking AI Model for '{normalized_text}'...")
+    except Exception as e:
+        logger.error("API ERROR: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
 
-        results = ml_pipeline.search_products(request.text, top_k=request.top_k)
 
-        # Let's add source tags to the results.
-        final_response = {
-            "results": results,
-            "source": "vector_db",
-            "count": len(results)
-        }
+@app.post("/recommend/batch")
+def recommend_products_batch(batch: BatchSearchRequest, response: Response):
+    """
+    Answers several searches in one round trip.
+    Cache misses that do not take the lexical fast path are encoded together in a
+    single encoder call; the Qdrant query (and the lexical / re-ranking stages)
+    still run once per request.
+    Responses are returned in the same order as the requests.
+    """
+    ensure_pipeline_ready()
+    try:
+        cached = [read_cache(request) for request in batch.requests]
+        responses = [cached_result for cached_result, _ in cached]
+        max_age = min([ttl for cached_result, ttl in cached if cached_result is not None] + [CACHE_TTL_SECONDS])
 
-        # --- 3. SAVING TO REDIS ---
-        if redis_client and results:
-            cache_data = final_response.copy()
-            cache_data["source"] = "redis_cache"
+        misses = [i for i, cached_result in enumerate(responses) if cached_result is None]
+        to_encode = [i for i in misses if ml_pipeline.needs_encoder(batch.requests[i].text)]
 
-            # Keep in cache for 1 hour (3600 seconds)
-            redis_client.setex(cache_key, 3600, json.dumps(cache_data, cls=NpEncoder))
+        query_vectors = {}
+        if to_encode:
+            vectors = ml_pipeline.encode_queries([batch.requests[i].text for i in to_encode])
+            query_vectors = dict(zip(to_encode, vectors))
+        for i in misses:
+            responses[i] = search_and_cache(batch.requests[i], query_vector=query_vectors.get(i))
 
-        return final_response
+        # The whole batch is only as fresh as its oldest cached entry
+        response.headers["Cache-Control"] = f"max-age={max_age}"
+        return {"responses": responses, "count": len(responses)}
 
     except Exception as e:
-        logger.error(f"API ERROR: {str(e)}")
+        logger.error("API ERROR: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -0,0 +1,339 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+DEFAULT_BASE_URL = "http://localhost:8001"
+RECOMMEND_ENDPOINT = "/recommend"
+BATCH_ENDPOINT = "/recommend/batch"
+
+# Must match BatchSearchRequest.requests max_length in src/api/app.py
+MAX_BATCH_SIZE = 32
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class RecommenderAPIError(Exception):
+    """
+    Raised when the API answers with a non-2xx status code (after retries).
+    """
+    def __init__(self, status_code, message):
+        super().__init__(f"API Code {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class ResponseCache:
+    """
+    Small in-process LRU cache that honors the server's Cache-Control max-age hint.
+    Keys are normalized the same way as the API's Redis keys.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text, top_k, options=None):
+        key = f"{text.lower().strip()}:{top_k}"
+        if options:
+            key += ":" + ":".join(f"{name}={options[name]}" for name in sorted(options))
+        return key
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key, data, ttl):
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def parse_max_age(response):
+    """
+    Extracts the max-age (seconds) from the Cache-Control header, 0 if absent.
+    """
+    match = MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else 0
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """
+    Exponential backoff with full jitter, so retrying clients do not stampede the API.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def raise_for_status(response):
+    if response.status_code >= 400:
+        raise RecommenderAPIError(response.status_code, response.text)
+
+
+def cacheable(data):
+    # Empty results are not cached by the API either.
+    return bool(data.get("results"))
+
+
+def mark_local_cache(data):
+    data = dict(data)
+    data["source"] = "local_cache"
+    return data
+
+
+class RecommenderClient:
+    """
+    Synchronous client for the H&M Recommender API.
+    Keeps one pooled keep-alive connection for its whole lifetime
+    (create it once and reuse it, e.g. with st.cache_resource).
+    """
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=10.0, max_retries=3,
+                 backoff_base=0.2, backoff_max=2.0, cache_size=256, http2=False,
+                 max_connections=10, transport=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = ResponseCache(max_size=cache_size)
+
+        # HTTP/2 needs the optional 'h2' package (pip install httpx[http2]).
+        self._http = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    def _post(self, endpoint, payload):
+        """
+        POST with jittered exponential backoff on 503 (model still loading / overloaded).
+        """
+        for attempt in range(self.max_retries + 1):
+            response = self._http.post(endpoint, json=payload)
+            if response.status_code != 503 or attempt == self.max_retries:
+                break
+            time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+        raise_for_status(response)
+        return response
+
+    def recommend(self, text, top_k=5, **options):
+        """
+        Returns the API response dict: {"results": [...], "source": ..., "count": ...}
+        Extra keyword options (diversify, oversample, diversity_lambda) are sent as-is.
+        """
+        key = ResponseCache.make_key(text, top_k, options)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return mark_local_cache(cached)
+
+        response = self._post(RECOMMEND_ENDPOINT, {"text": text, "top_k": top_k, **options})
+        data = response.json()
+        if cacheable(data):
+            self.cache.set(key, data, parse_max_age(response))
+        return data
+
+    def recommend_batch(self, queries, top_k=5, **options):
+        """
+        Answers several queries with as few round trips as possible.
+        Locally cached queries are skipped; the rest are sent in chunks of MAX_BATCH_SIZE.
+        Returns the responses in the same order as the queries.
+        """
+        keys = [ResponseCache.make_key(text, top_k, options) for text in queries]
+        responses = [self.cache.get(key) for key in keys]
+        responses = [mark_local_cache(r) if r is not None else None for r in responses]
+        missing = [i for i, r in enumerate(responses) if r is None]
+
+        for start in range(0, len(missing), MAX_BATCH_SIZE):
+            chunk = missing[start: start + MAX_BATCH_SIZE]
+            payload = {"requests": [{"text": queries[i], "top_k": top_k, **options} for i in chunk]}
+            response = self._post(BATCH_ENDPOINT, payload)
+            ttl = parse_max_age(response)
+
+            for i, data in zip(chunk, response.json()["responses"]):
+                responses[i] = data
+                if cacheable(data):
+                    self.cache.set(keys[i], data, ttl)
+
+        return responses
+
+    def close(self):
+        self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncRecommenderClient:
+    """
+    Asynchronous client for the H&M Recommender API.
+    With coalesce=True, concurrent recommend() calls that arrive within
+    'coalesce_window' seconds are merged into a single /recommend/batch request.
+    """
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=10.0, max_retries=3,
+                 backoff_base=0.2, backoff_max=2.0, cache_size=256, http2=False,
+                 max_connections=10, coalesce=False, coalesce_window=0.005,
+                 transport=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = ResponseCache(max_size=cache_size)
+        self.coalesce = coalesce
+        self.coalesce_window = coalesce_window
+
+        # Pending coalesced calls: (payload, cache key, future)
+        self._pending = []
+        self._flush_task = None
+        # Batches already sent; kept referenced so they finish before aclose()
+        self._batch_tasks = set()
+
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def _post(self, endpoint, payload):
+        for attempt in range(self.max_retries + 1):
+            response = await self._http.post(endpoint, json=payload)
+            if response.status_code != 503 or attempt == self.max_retries:
+                break
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+        raise_for_status(response)
+        return response
+
+    async def recommend(self, text, top_k=5, **options):
+        key = ResponseCache.make_key(text, top_k, options)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return mark_local_cache(cached)
+
+        payload = {"text": text, "top_k": top_k, **options}
+        if not self.coalesce:
+            response = await self._post(RECOMMEND_ENDPOINT, payload)
+            data = response.json()
+            if cacheable(data):
+                self.cache.set(key, data, parse_max_age(response))
+            return data
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, key, future))
+        if len(self._pending) >= MAX_BATCH_SIZE:
+            self._flush_now()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def recommend_batch(self, queries, top_k=5, **options):
+        return await asyncio.gather(*(self.recommend(text, top_k, **options) for text in queries))
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.coalesce_window)
+        self._flush_task = None
+        self._flush_now()
+
+    def _flush_now(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.create_task(self._send_batch(pending))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, pending):
+        if len(pending) == 1:
+            await self._send_one(*pending[0])
+            return
+
+        try:
+            payload = {"requests": [item[0] for item in pending]}
+            response = await self._post(BATCH_ENDPOINT, payload)
+            responses = response.json()["responses"]
+        except RecommenderAPIError as e:
+            if e.status_code == 422:
+                # The batch is validated as a whole: one invalid call must not fail
+                # the unrelated calls that shared its coalescing window.
+                await asyncio.gather(*(self._send_one(*item) for item in pending))
+                return
+            self._fail(pending, e)
+            return
+        except Exception as e:
+            self._fail(pending, e)
+            return
+
+        ttl = parse_max_age(response)
+        for (_, key, future), data in zip(pending, responses):
+            if cacheable(data):
+                self.cache.set(key, data, ttl)
+            if not future.done():
+                future.set_result(data)
+
+    async def _send_one(self, payload, key, future):
+        try:
+            response = await self._post(RECOMMEND_ENDPOINT, payload)
+            data = response.json()
+        except Exception as e:
+            self._fail([(payload, key, future)], e)
+            return
+
+        if cacheable(data):
+            self.cache.set(key, data, parse_max_age(response))
+        if not future.done():
+            future.set_result(data)
+
+    @staticmethod
+    def _fail(pending, error):
+        for _, _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    async def aclose(self):
+        # Send whatever is still waiting for the coalescing window before closing.
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        pending, self._pending = self._pending, []
+        if pending:
+            await self._send_batch(pending)
+        # Wait for in-flight batches before closing the connection pool under them.
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        await self._http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
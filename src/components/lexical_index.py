@@ -0,0 +1,196 @@
+import os
+import re
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """
+    Lowercases the text and splits it into alphanumeric tokens.
+    """
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class LexicalIndex:
+    """
+    Compact BM25 inverted index over product names and descriptions.
+    Postings are stored CSR-style in flat NumPy arrays (no per-term Python lists),
+    so the whole index is a handful of arrays that load from a single .npz file.
+    """
+    def __init__(self, vocabulary, offsets, postings_docs, postings_tfs, doc_lengths,
+                 doc_ids, doc_names, doc_product_codes, k1=1.2, b=0.75):
+        self.vocabulary = {term: i for i, term in enumerate(vocabulary)}
+        self.offsets = offsets
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.doc_lengths = doc_lengths
+        self.doc_ids = doc_ids
+        self.doc_names = doc_names
+        self.doc_product_codes = doc_product_codes
+        self.k1 = k1
+        self.b = b
+
+        self.n_docs = len(doc_ids)
+        self.avg_doc_length = float(doc_lengths.mean()) if self.n_docs else 0.0
+        doc_freqs = np.diff(offsets).astype(np.float32)
+        self.idf = np.log(1.0 + (self.n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+
+        # Exact product name -> document indices (for the lexical fast path)
+        self.name_index = {}
+        for i, name in enumerate(doc_names):
+            self.name_index.setdefault(name, []).append(i)
+
+    @classmethod
+    def build(cls, ids, names, descriptions, product_codes=None, **bm25_params):
+        """
+        Builds the index from parallel lists of article ids, product names and descriptions.
+        product_codes defaults to article_id // 1000 (H&M colour variants share it).
+        """
+        if product_codes is None:
+            product_codes = [int(idx) // 1000 for idx in ids]
+
+        vocabulary = {}
+        doc_terms, doc_tfs, doc_lengths = [], [], []
+
+        for name, description in zip(names, descriptions):
+            tokens = tokenize(name) + tokenize(description)
+            term_ids, counts = np.unique(
+                np.array([vocabulary.setdefault(t, len(vocabulary)) for t in tokens], dtype=np.int64),
+                return_counts=True
+            )
+            doc_terms.append(term_ids)
+            doc_tfs.append(counts)
+            doc_lengths.append(len(tokens))
+
+        # Invert document -> terms into term -> documents (sorted by term, then document)
+        lengths = np.array([len(t) for t in doc_terms], dtype=np.int64)
+        all_terms = np.concatenate(doc_terms) if doc_terms else np.zeros(0, dtype=np.int64)
+        all_tfs = np.concatenate(doc_tfs) if doc_tfs else np.zeros(0, dtype=np.int64)
+        all_docs = np.repeat(np.arange(len(doc_terms), dtype=np.int64), lengths)
+
+        order = np.lexsort((all_docs, all_terms))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(all_terms, minlength=len(vocabulary)), out=offsets[1:])
+
+        return cls(
+            vocabulary=list(vocabulary),
+            offsets=offsets,
+            postings_docs=all_docs[order].astype(np.int32),
+            postings_tfs=all_tfs[order].astype(np.float32),
+            doc_lengths=np.array(doc_lengths, dtype=np.float32),
+            doc_ids=np.array(ids, dtype=np.int64),
+            doc_names=[" ".join(tokenize(name)) for name in names],
+            doc_product_codes=np.array(product_codes, dtype=np.int64),
+            **bm25_params
+        )
+
+    def save(self, path):
+        """
+        Writes the index atomically (temporary file + rename), so a running API
+        that reloads on mtime change never reads a half-written file.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            vocabulary=np.array(vocabulary, dtype=str),
+            offsets=self.offsets,
+            postings_docs=self.postings_docs,
+            postings_tfs=self.postings_tfs,
+            doc_lengths=self.doc_lengths,
+            doc_ids=self.doc_ids,
+            doc_names=np.array(self.doc_names, dtype=str),
+            doc_product_codes=self.doc_product_codes,
+            bm25=np.array([self.k1, self.b], dtype=np.float32),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            k1, b = data['bm25'].tolist()
+            return cls(
+                vocabulary=data['vocabulary'].tolist(),
+                offsets=data['offsets'],
+                postings_docs=data['postings_docs'],
+                postings_tfs=data['postings_tfs'],
+                doc_lengths=data['doc_lengths'],
+                doc_ids=data['doc_ids'],
+                doc_names=data['doc_names'].tolist(),
+                doc_product_codes=data['doc_product_codes'],
+                k1=k1,
+                b=b,
+            )
+
+    def score(self, tokens):
+        """
+        BM25 scores of every document for the given query tokens.
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for token in set(tokens):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tfs = self.postings_tfs[start:end]
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_doc_length)
+            # Documents are unique within a posting list, so fancy-index add is safe.
+            scores[docs] += self.idf[term_id] * tfs * (self.k1 + 1) / (tfs + norm)
+        return scores
+
+    def search(self, tokens, limit):
+        """
+        Returns (article_ids, bm25_scores) of the best 'limit' documents, best first.
+        """
+        scores = self.score(tokens)
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return self.doc_ids[candidates], scores[candidates]
+
+    def exact_name_matches(self, tokens, limit, max_products=None, min_idf=None):
+        """
+        Article ids whose product name equals the query exactly (ignoring case/punctuation),
+        ordered by BM25 score. Returns (article_ids, scores normalized to the best match).
+
+        Confidence gates (empty result if one fails):
+        - max_products: the name may map to at most this many distinct product codes
+          (generic names like "Strap top" are shared by many unrelated products).
+        - min_idf: the mean IDF of the name tokens must reach this value.
+        """
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        matches = self.name_index.get(" ".join(tokens))
+        if not matches:
+            return empty
+
+        matches = np.array(matches, dtype=np.int64)
+        if max_products is not None and len(np.unique(self.doc_product_codes[matches])) > max_products:
+            return empty
+        if min_idf is not None:
+            term_ids = [self.vocabulary[token] for token in tokens]
+            if self.idf[term_ids].mean() < min_idf:
+                return empty
+
+        scores = self.score(tokens)[matches]
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return self.doc_ids[matches[order]], scores[order] / max(scores[order[0]], 1e-12)
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuses several ranked id lists: score(id) = sum over lists of 1 / (k + rank).
+    Scores are normalized so an id ranked first in every list gets 1.0.
+    Returns (ids, scores), best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking, start=1):
+            fused[idx] = fused.get(idx, 0.0) + 1.0 / (k + rank)
+
+    best_possible = len(rankings) / (k + 1)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return [idx for idx, _ in ordered], [score / best_possible for _, score in ordered]
@@ -0,0 +1,254 @@
+import argparse
+import itertools
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+# Relative import to access the config reader
+from ..utils.common import read_config
+from .inference_pipeline import InferencePipeline
+
+
+def exact_top_k(query_vectors, doc_vectors, k, chunk_size=256):
+    """
+    Brute-force cosine top-k (the ground truth for ANN search).
+    Vectors must be L2-normalized. Queries are processed in chunks to bound memory.
+    Returns (indices, scores), both of shape (n_queries, k), best first.
+    """
+    k = min(k, len(doc_vectors))
+    all_indices, all_scores = [], []
+
+    for start in range(0, len(query_vectors), chunk_size):
+        scores = query_vectors[start: start + chunk_size] @ doc_vectors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        all_indices.append(np.take_along_axis(top, order, axis=1))
+        all_scores.append(np.take_along_axis(top_scores, order, axis=1))
+
+    return np.vstack(all_indices), np.vstack(all_scores)
+
+
+def recall_at_k(retrieved, relevant):
+    """
+    Fraction of the exact top-k found by the ANN search, per query.
+    Both arrays have shape (n_queries, k); -1 marks a missing result.
+    """
+    k = relevant.shape[1]
+    hits = (retrieved[:, :, None] == relevant[:, None, :]).any(axis=2) & (retrieved >= 0)
+    return hits.sum(axis=1) / k
+
+
+def ndcg_at_k(retrieved_scores, ideal_scores):
+    """
+    nDCG with the exact cosine similarity as graded relevance, per query.
+    ANN results that miss or reorder the true neighbours lose gain.
+    """
+    k = ideal_scores.shape[1]
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = (retrieved_scores * discounts).sum(axis=1)
+    ideal_dcg = (ideal_scores * discounts).sum(axis=1)
+    return np.divide(dcg, ideal_dcg, out=np.zeros_like(dcg), where=ideal_dcg > 0)
+
+
+def pareto_front(df, quality="recall@k", cost="p95_ms"):
+    """
+    Marks settings for which no other setting is both at least as accurate and at least as fast
+    (and strictly better in one of the two).
+    """
+    quality_values = df[quality].to_numpy()
+    cost_values = df[cost].to_numpy()
+
+    better_or_equal = (quality_values[None, :] >= quality_values[:, None]) & (cost_values[None, :] <= cost_values[:, None])
+    strictly_better = (quality_values[None, :] > quality_values[:, None]) | (cost_values[None, :] < cost_values[:, None])
+    return ~(better_or_equal & strictly_better).any(axis=1)
+
+
+class EvaluationPipeline:
+    def __init__(self, config_path="config/config.yaml"):
+        """
+        Initializes the offline ANN Evaluation Pipeline.
+        Reuses InferencePipeline (same Qdrant collection, encoder and search code path)
+        so the measured settings are exactly what production would run.
+        """
+        # 1. Load Configuration
+        self.config = read_config(config_path)
+        self.eval_config = self.config['evaluation']
+
+        # 2. Setup Paths
+        self.base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.output_path = os.path.join(self.base_dir, self.eval_config['output_path'])
+
+        # 3. Load Inference Pipeline (Qdrant + Encoder)
+        self.pipeline = InferencePipeline(config_path)
+
+    def load_collection(self):
+        """
+        Scrolls every stored embedding (and payload) out of Qdrant.
+        Returns (ids, L2-normalized vectors, payloads).
+        """
+        ids, vectors, payloads = [], [], []
+        offset = None
+
+        with tqdm(desc="Reading embeddings from Qdrant") as progress:
+            while True:
+                records, offset = self.pipeline.client.scroll(
+                    collection_name=self.pipeline.collection_name,
+                    limit=self.eval_config['scroll_batch_size'],
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                # Convert per batch: avoids holding every vector as Python floats
+                if records:
+                    ids.extend(record.id for record in records)
+                    vectors.append(np.asarray([record.vector for record in records], dtype=np.float32))
+                    payloads.extend(record.payload for record in records)
+                progress.update(len(records))
+                if offset is None:
+                    break
+
+        vectors = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return np.array(ids), vectors, payloads
+
+    def load_queries(self, payloads, query_file=None):
+        """
+        Reads queries from a JSONL log (one {"text": ...} or {"query": ...} object per line),
+        e.g. the API's logs/app.log, where only the "recommend" lines are used.
+        Without a log file, builds synthetic queries like "black trousers" from stored payloads.
+        """
+        if query_file:
+            queries = []
+            with open(query_file, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        # app.log: one "recommend" line per API request (skip "search" and other lines)
+                        if 'message' in record and record['message'] != 'recommend':
+                            continue
+                        text = record.get('text') or record.get('query')
+                        if text:
+                            queries.append(text)
+            return queries
+
+        candidates = sorted({
+            f"{p.get('colour_group_name', '')} {p.get('product_type_name', '')}".strip().lower()
+            for p in payloads
+        })
+        rng = np.random.default_rng(42)
+        n_queries = min(self.eval_config['n_queries'], len(candidates))
+        return [candidates[i] for i in rng.choice(len(candidates), n_queries, replace=False)]
+
+    def sweep_settings(self):
+        """
+        Cartesian product of the configured sweep values, e.g. every hnsw_ef x rescore combination.
+        """
+        sweep = self.eval_config['sweep']
+        names = list(sweep)
+        return [dict(zip(names, values)) for values in itertools.product(*(sweep[name] for name in names))]
+
+    def evaluate_setting(self, settings, query_vectors, true_indices, true_scores, doc_vectors, id_to_row):
+        """
+        Runs every query with one search setting and returns its quality and latency row.
+        """
+        k = true_indices.shape[1]
+        search_params = self.pipeline.build_search_params(settings)
+
+        retrieved = np.full(true_indices.shape, -1, dtype=np.int64)
+        latencies = np.zeros(len(query_vectors))
+
+        for i, query_vector in enumerate(query_vectors):
+            start_time = time.perf_counter()
+            hits = self.pipeline.dense_search(query_vector.tolist(), limit=k, search_params=search_params)
+            latencies[i] = (time.perf_counter() - start_time) * 1000
+
+            rows = [id_to_row[hit.id] for hit in hits if hit.id in id_to_row][:k]
+            retrieved[i, :len(rows)] = rows
+
+        # Exact similarity of what the ANN search returned (0 for missing results)
+        retrieved_scores = np.where(
+            retrieved >= 0,
+            np.einsum("qd,qkd->qk", query_vectors, doc_vectors[np.maximum(retrieved, 0)]),
+            0.0
+        )
+
+        return {
+            **settings,
+            "recall@k": recall_at_k(retrieved, true_indices).mean(),
+            "ndcg@k": ndcg_at_k(retrieved_scores, true_scores).mean(),
+            "p50_ms": np.percentile(latencies, 50),
+            "p95_ms": np.percentile(latencies, 95),
+            "p99_ms": np.percentile(latencies, 99),
+        }
+
+    def run_evaluation(self, query_file=None):
+        """
+        Executes the evaluation:
+        1. Reads all embeddings from Qdrant.
+        2. Loads (or synthesizes) the query set and encodes it.
+        3. Computes exact brute-force top-k ground truth.
+        4. Runs the ANN search for every sweep setting and reports recall, nDCG and latency.
+        5. Saves the table and marks the Pareto-optimal settings.
+
+        Returns:
+            pd.DataFrame: One row per setting.
+        """
+        k = self.eval_config['k']
+
+        ids, doc_vectors, payloads = self.load_collection()
+        id_to_row = {idx: row for row, idx in enumerate(ids.tolist())}
+        print(f"📦 {len(ids)} embeddings loaded.")
+
+        queries = self.load_queries(payloads, query_file)
+        if not queries:
+            if query_file:
+                info_rate = self.config.get('logging', {}).get('sampling', {}).get('INFO', 1.0)
+                raise ValueError(
+                    f"No queries found in {query_file}. The API logs only {info_rate:.0%} of requests "
+                    f"(logging.sampling.INFO) and the file restarts after rotation; "
+                    f"send more traffic, pass a rotated backup (app.log.1) or omit --queries.")
+            raise ValueError("No queries could be built: the Qdrant collection is empty.")
+        print(f"📝 {len(queries)} queries {'from ' + query_file if query_file else '(synthetic)'}.")
+
+        start_time = time.perf_counter()
+        query_vectors = np.asarray(self.pipeline.encoder.encode(queries, batch_size=64), dtype=np.float32)
+        encode_ms = (time.perf_counter() - start_time) * 1000 / len(queries)
+        query_vectors /= np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+        print(f"🧠 Encoding: {encode_ms:.2f} ms per query (batched, not included below).")
+
+        true_indices, true_scores = exact_top_k(query_vectors, doc_vectors, k)
+
+        # Warm-up (connection pool, Qdrant caches) so the first setting is not penalized
+        for query_vector in query_vectors[:10]:
+            self.pipeline.dense_search(query_vector.tolist(), limit=k)
+
+        rows = []
+        for settings in tqdm(self.sweep_settings(), desc="Evaluating settings"):
+            rows.append(self.evaluate_setting(settings, query_vectors, true_indices, true_scores,
+                                              doc_vectors, id_to_row))
+
+        results = pd.DataFrame(rows)
+        results["pareto"] = pareto_front(results)
+        results = results.sort_values("p95_ms").reset_index(drop=True)
+
+        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+        results.to_csv(self.output_path, index=False)
+
+        print("-" * 50)
+        print(results.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+        print("-" * 50)
+        print(f"✅ Results saved to {self.output_path} (pareto=True rows are the candidates for production).")
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline ANN recall/latency evaluation against exact search.")
+    parser.add_argument("--queries", default=None, help="JSONL query log, e.g. logs/app.log.")
+    args = parser.parse_args()
+
+    evaluator = EvaluationPipeline()
+    evaluator.run_evaluation(query_file=args.queries)
@@ -1,11 +1,27 @@
 import sys
 import os
+import time
+import threading
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
+from qdrant_client.http import models
 
 # Relative import to access the config reader
 from ..utils.common import read_config
-from ..utils.logger import logger
+from ..utils.logger import logger, request_logger
+from ..utils.metrics import SEARCH_PATH_LATENCY, SEARCH_STAGE_LATENCY
+from ..components.reranking import product_codes, collapse_variants, mmr_rerank
+from ..components.lexical_index import LexicalIndex, tokenize, reciprocal_rank_fusion
+
+
+def record_stage(timings, stage, stage_start):
+    """
+    Stores a stage duration (ms) for the request log and exports it to Prometheus.
+    """
+    elapsed = time.perf_counter() - stage_start
+    timings[stage] = round(elapsed * 1000, 3)
+    SEARCH_STAGE_LATENCY.labels(stage).observe(elapsed)
 
 
 class InferencePipeline:
@@ -23,6 +39,12 @@ class InferencePipeline:
         self.qdrant_port = int(os.getenv("QDRANT_PORT", self.config['qdrant']['port']))
         self.collection_name = self.config['qdrant']['collection_name']
 
+        # ANN search settings (HNSW ef / quantization), tuned with the Evaluation Pipeline
+        self.search_params = self.build_search_params(self.config.get('search', {}))
+
+        # Diversity re-ranking defaults (can be overridden per request)
+        self.rerank_config = self.config.get('reranking', {})
+
         logger.info(f"🔌 Connecting to Qdrant at {self.qdrant_host}:{self.qdrant_port}...")
 
         try:
@@ -39,42 +61,321 @@ class InferencePipeline:
         self.encoder = SentenceTransformer(self.model_name)
         logger.info("✅ AI Model Loaded!")
 
-    def search_products(self, query_text, top_k=5):
+        # 4. Load Lexical (BM25) Index built by the Ingestion Pipeline
+        # The file is re-checked during search, so an index written (or rewritten)
+        # by the ETL worker after startup is picked up without restarting the API.
+        self.lexical_config = self.config.get('lexical', {})
+        self.lexical_index = None
+        self.lexical_index_mtime = None
+        self.lexical_last_check = 0.0
+        self.lexical_reload_lock = threading.Lock()
+        self.base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.lexical_index_path = os.path.join(self.base_dir, self.lexical_config.get('index_path', ''))
+
+        self.refresh_lexical_index(force=True)
+        if self.lexical_index is None:
+            logger.warning(f"⚠️ Lexical index not found at {self.lexical_index_path}. Using dense search only.")
+
+    def refresh_lexical_index(self, force=False):
+        """
+        (Re)loads the lexical index when its file appeared or its mtime changed.
+        Checks at most every 'reload_check_seconds'; only one thread loads at a time,
+        the others keep serving with the current index.
+        """
+        if not self.lexical_config:
+            return
+
+        now = time.monotonic()
+        if not force and now - self.lexical_last_check < self.lexical_config.get('reload_check_seconds', 30):
+            return
+        if not self.lexical_reload_lock.acquire(blocking=False):
+            return
+
+        try:
+            self.lexical_last_check = now
+            try:
+                mtime = os.path.getmtime(self.lexical_index_path)
+            except OSError:
+                return
+            if mtime == self.lexical_index_mtime:
+                return
+
+            self.lexical_index = LexicalIndex.load(self.lexical_index_path)
+            self.lexical_index_mtime = mtime
+            logger.info("Lexical index loaded (%d documents)", self.lexical_index.n_docs)
+        except Exception as e:
+            logger.warning("Could not load lexical index: %s", e, exc_info=True)
+        finally:
+            self.lexical_reload_lock.release()
+
+    def search_products(self, query_text, top_k=5, diversify=None, oversample=None, diversity_lambda=None,
+                        query_vector=None):
         """
         Performs semantic search for the given query.
+        - query_vector: optional pre-computed embedding (see encode_queries), skips the encoder.
+        - Lexical fast path: short queries that are an exact product name are answered
+          from the BM25 index alone, without running the encoder.
+        - Hybrid: dense and BM25 candidates are fused with Reciprocal Rank Fusion.
+        - With diversify=True, over-fetches top_k * oversample candidates, collapses colour
+          variants of the same product and re-ranks them with MMR before truncating to top_k.
         Returns a list of dictionaries (compatible with API response).
         """
-        logger.info(f"🔎 SEARCHING: '{query_text}'")
+        if diversify is None:
+            diversify = self.rerank_config.get('enabled', False)
+        if oversample is None:
+            oversample = self.rerank_config.get('oversample', 4)
+        if diversity_lambda is None:
+            diversity_lambda = self.rerank_config.get('diversity_lambda', 0.7)
+
+        start_time = time.perf_counter()
+        path = "dense"
+        timings = {}
+        results = []
+        n_candidates = top_k * oversample if diversify else top_k
 
         try:
-            # 1. TRANSLATION: Text -> Vector
-            query_vector = self.encoder.encode(query_text).tolist()
-
-            # 2. SEARCH: Query Qdrant
-            search_result = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_vector,
-                limit=top_k
-            )
+            self.refresh_lexical_index()
+            lexical_index = self.lexical_index
+            tokens = tokenize(query_text) if lexical_index else []
+
+            # 1. LEXICAL FAST PATH: confident exact product name -> no encoding needed
+            if tokens and len(tokens) <= self.lexical_config.get('fast_path_max_terms', 4):
+                stage_start = time.perf_counter()
+                exact_ids, exact_scores = self.lexical_fast_path_matches(tokens, n_candidates, lexical_index)
+                hits = self.fetch_points(exact_ids.tolist(), exact_scores.tolist()) if len(exact_ids) else []
+                record_stage(timings, "lexical", stage_start)
+
+                # No hits: index is stale compared to Qdrant -> continue with the normal path
+                if hits:
+                    path = "lexical"
+                    if diversify:
+                        keep = collapse_variants(product_codes([h.id for h in hits], [h.payload for h in hits]))
+                        hits = [hits[i] for i in keep]
+                    results = self.format_results(hits[:top_k], path)
+                    return results
+
+            hybrid = bool(tokens) and self.lexical_config.get('hybrid', False)
+            if hybrid:
+                n_candidates = max(n_candidates, self.lexical_config.get('candidates', 20))
 
-            # 3. FORMAT RESULTS
-            results = []
-            for hit in search_result:
-                product_data = {
-                    "score": hit.score,
-                    "product_name": hit.payload.get('prod_name', 'Unknown'),
-                    "description": hit.payload.get('detail_desc', ''),
-                    "category": hit.payload.get('product_group_name', 'Unknown'),
-                    "details": hit.payload
-                }
-                results.append(product_data)
+            # 2. TRANSLATION: Text -> Vector
+            if query_vector is None:
+                stage_start = time.perf_counter()
+                query_vector = self.encoder.encode(query_text).tolist()
+                record_stage(timings, "encode", stage_start)
 
+            # 3. SEARCH: Query Qdrant
+            stage_start = time.perf_counter()
+            search_result = self.dense_search(query_vector, limit=n_candidates, with_vectors=diversify)
+            record_stage(timings, "dense", stage_start)
+
+            # 4. FUSION: Dense + BM25 candidates with Reciprocal Rank Fusion
+            similarities = None
+            if hybrid:
+                stage_start = time.perf_counter()
+                lexical_ids, _ = lexical_index.search(tokens, limit=n_candidates)
+                if len(lexical_ids):
+                    path = "hybrid"
+                    search_result, similarities = self.fuse_hits(search_result, lexical_ids.tolist(), query_vector)
+                record_stage(timings, "fusion", stage_start)
+
+            # 5. RE-RANK: Collapse colour variants + MMR diversity (optional 2nd stage)
+            if diversify and search_result:
+                stage_start = time.perf_counter()
+                search_result = self.diversify_hits(search_result, top_k, diversity_lambda)
+                record_stage(timings, "rerank", stage_start)
+
+            results = self.format_results(search_result[:top_k], path, similarities)
             return results
 
         except Exception as e:
-            logger.error(f"❌ Error during search: {e}")
+            logger.error("Error during search: %s", e, exc_info=True)
             return []
 
+        finally:
+            elapsed = time.perf_counter() - start_time
+            SEARCH_PATH_LATENCY.labels(path).observe(elapsed)
+            # One structured (sampled) line per search instead of per-stage INFO lines
+            request_logger.info("search", extra={
+                "query": query_text,
+                "path": path,
+                "results": len(results),
+                "duration_ms": round(elapsed * 1000, 3),
+                "timings_ms": timings
+            })
+
+    def lexical_fast_path_matches(self, tokens, limit, lexical_index):
+        """
+        Confident exact product name matches (ids, scores) for the lexical fast path,
+        empty if the query has to go through the encoder.
+        """
+        return lexical_index.exact_name_matches(
+            tokens,
+            limit=limit,
+            max_products=self.lexical_config.get('fast_path_max_products'),
+            min_idf=self.lexical_config.get('fast_path_min_idf')
+        )
+
+    def needs_encoder(self, query_text):
+        """
+        False if the query will be answered by the lexical fast path (so batch callers
+        only encode the remaining queries). A stale index still falls back to encoding
+        inside search_products.
+        """
+        lexical_index = self.lexical_index
+        if lexical_index is None:
+            return True
+        tokens = tokenize(query_text)
+        if not tokens or len(tokens) > self.lexical_config.get('fast_path_max_terms', 4):
+            return True
+        exact_ids, _ = self.lexical_fast_path_matches(tokens, 1, lexical_index)
+        return len(exact_ids) == 0
+
+    def encode_queries(self, query_texts):
+        """
+        Encodes several queries in a single encoder call (one forward pass per batch
+        instead of one per query). Returns one vector (list of floats) per query.
+        """
+        stage_start = time.perf_counter()
+        vectors = self.encoder.encode(list(query_texts)).tolist()
+        SEARCH_STAGE_LATENCY.labels("encode").observe(time.perf_counter() - stage_start)
+        return vectors
+
+    @staticmethod
+    def build_search_params(settings):
+        """
+        Builds Qdrant SearchParams from a settings dict
+        (keys: hnsw_ef, exact, quantization_rescore, quantization_oversampling).
+        Missing / null values keep Qdrant's defaults.
+        """
+        if not settings:
+            return None
+
+        quantization = None
+        if settings.get('quantization_rescore') is not None or settings.get('quantization_oversampling') is not None:
+            quantization = models.QuantizationSearchParams(
+                rescore=settings.get('quantization_rescore'),
+                oversampling=settings.get('quantization_oversampling')
+            )
+
+        return models.SearchParams(
+            hnsw_ef=settings.get('hnsw_ef'),
+            exact=bool(settings.get('exact', False)),
+            quantization=quantization
+        )
+
+    def dense_search(self, query_vector, limit, with_vectors=False, search_params=None):
+        """
+        ANN search in Qdrant with the configured search settings (or the given override).
+        """
+        return self.client.search(
+            collection_name=self.collection_name,
+            query_vector=query_vector,
+            limit=limit,
+            with_vectors=with_vectors,
+            search_params=search_params or self.search_params
+        )
+
+    @staticmethod
+    def format_results(hits, path="dense", similarities=None):
+        """
+        Converts Qdrant hits into the API response format.
+        - score: cosine similarity to the query ("dense" / "hybrid"),
+          or BM25 score relative to the best exact name match ("lexical").
+        - fused_score: normalized RRF score the hybrid results are ranked by.
+        - retrieval: the search path that produced the result.
+        """
+        results = []
+        for hit in hits:
+            product_data = {
+                "score": similarities[hit.id] if similarities is not None else hit.score,
+                "product_name": hit.payload.get('prod_name', 'Unknown'),
+                "description": hit.payload.get('detail_desc', ''),
+                "category": hit.payload.get('product_group_name', 'Unknown'),
+                "retrieval": path,
+                "details": hit.payload
+            }
+            if similarities is not None:
+                product_data["fused_score"] = hit.score
+            results.append(product_data)
+        return results
+
+    def fetch_points(self, ids, scores, with_vectors=False):
+        """
+        Retrieves payloads (and optionally vectors) for the given ids from Qdrant.
+        Returns scored hits in the order of 'ids'; ids missing from the collection are skipped.
+        """
+        records = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=ids,
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        records_by_id = {record.id: record for record in records}
+
+        return [
+            models.ScoredPoint(id=idx, version=0, score=score,
+                               payload=records_by_id[idx].payload, vector=records_by_id[idx].vector)
+            for idx, score in zip(ids, scores) if idx in records_by_id
+        ]
+
+    def fuse_hits(self, dense_hits, lexical_ids, query_vector):
+        """
+        Merges dense hits and BM25 ids with Reciprocal Rank Fusion.
+        Hit scores become normalized RRF scores (used for ranking and re-ranking);
+        lexical-only ids are fetched from Qdrant with their vectors.
+        Returns (fused hits, {id: cosine similarity to the query}) so the response
+        keeps the same kind of 'score' as the dense path.
+        """
+        dense_by_id = {hit.id: hit for hit in dense_hits}
+        fused_ids, fused_scores = reciprocal_rank_fusion(
+            [list(dense_by_id), lexical_ids],
+            k=self.lexical_config.get('rrf_k', 60)
+        )
+        similarities = {idx: hit.score for idx, hit in dense_by_id.items()}
+
+        missing = [idx for idx in fused_ids if idx not in dense_by_id]
+        fetched = {}
+        if missing:
+            fetched = {hit.id: hit for hit in self.fetch_points(missing, [0.0] * len(missing), with_vectors=True)}
+            if fetched:
+                query = np.asarray(query_vector, dtype=np.float32)
+                vectors = np.array([hit.vector for hit in fetched.values()], dtype=np.float32)
+                cosine = vectors @ query / np.maximum(
+                    np.linalg.norm(vectors, axis=1) * np.linalg.norm(query), 1e-12)
+                similarities.update(zip(fetched, cosine.tolist()))
+
+        fused = []
+        for idx, score in zip(fused_ids, fused_scores):
+            hit = dense_by_id.get(idx) or fetched.get(idx)
+            if hit is not None:
+                fused.append(models.ScoredPoint(id=idx, version=0, score=score,
+                                                payload=hit.payload, vector=hit.vector))
+        return fused, similarities
+
+    def diversify_hits(self, hits, top_k, diversity_lambda):
+        """
+        Second retrieval stage: one hit per product code, then MMR re-ranking.
+        Hits must carry their vectors (with_vectors=True).
+        """
+        start_time = time.perf_counter()
+        budget_ms = self.rerank_config.get('latency_budget_ms')
+
+        codes = product_codes([hit.id for hit in hits], [hit.payload for hit in hits])
+        keep = collapse_variants(codes)
+        hits = [hits[i] for i in keep]
+
+        vectors = np.array([hit.vector for hit in hits], dtype=np.float32)
+        relevance = np.array([hit.score for hit in hits], dtype=np.float32)
+        order = mmr_rerank(vectors, relevance, top_k, diversity_lambda, budget_ms=budget_ms)
+
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        if budget_ms is not None and elapsed_ms > budget_ms:
+            request_logger.warning("Re-ranking over latency budget",
+                                   extra={"rerank_ms": round(elapsed_ms, 3), "budget_ms": budget_ms})
+
+        return [hits[i] for i in order]
+
 
 if __name__ == "__main__":
     # --- SMOKE TEST ---
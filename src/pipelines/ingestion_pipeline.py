@@ -8,6 +8,7 @@ from qdrant_client.http import models
 
 # Relative import to access the config reader
 from ..utils.common import read_config
+from ..components.lexical_index import LexicalIndex
 
 
 class IngestionPipeline:
@@ -31,6 +32,7 @@ class IngestionPipeline:
 
         self.collection_name = self.config['qdrant']['collection_name']
         self.vector_size = self.config['qdrant']['vector_size']
+        self.lexical_index_path = os.path.join(self.base_dir, self.config['lexical']['index_path'])
 
         print(f"🔌 Connecting to Qdrant at {self.qdrant_host}:{self.qdrant_port}...")
 
@@ -80,7 +82,8 @@ class IngestionPipeline:
             ids = df['article_id'].tolist()
 
             # Prepare Metadata (Payload) for Qdrant
-            payloads = df[['prod_name', 'product_type_name', 'product_group_name',
+            # product_code groups the colour variants of an article (used for diversity re-ranking)
+            payloads = df[['prod_name', 'product_code', 'product_type_name', 'product_group_name',
                            'graphical_appearance_name', 'colour_group_name']].to_dict(orient='records')
 
             # --- QDRANT SETUP ---
@@ -128,6 +131,13 @@ class IngestionPipeline:
             print(
                 f"\n🎉 SUCCESS! {len(documents)} items successfully uploaded to Qdrant collection '{self.collection_name}'.")
 
+            # --- LEXICAL INDEX ---
+            print("📚 Building BM25 Lexical Index...")
+            lexical_index = LexicalIndex.build(ids, df['prod_name'].tolist(), df['detail_desc'].tolist(),
+                                               product_codes=df['product_code'].tolist())
+            lexical_index.save(self.lexical_index_path)
+            print(f"✅ Lexical Index saved to {self.lexical_index_path} ({len(lexical_index.vocabulary)} terms).")
+
         except Exception as e:
             print(f"❌ ERROR: Pipeline failed: {e}")
             raise e
@@ -1,13 +1,26 @@
 import streamlit as st
-import requests
+import httpx
 import os
+import sys
+
+# --- MODULE PATH SETTING ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from src.client.api_client import RecommenderClient, RecommenderAPIError
 
 # --- SETTINGS ---
 BASE_URL = os.getenv("BACKEND_URL", "http://localhost:8001")
 
-ENDPOINT = "/recommend"
 
-FULL_API_URL = f"{BASE_URL.rstrip('/')}{ENDPOINT}"
+@st.cache_resource
+def get_api_client():
+    """
+    One pooled keep-alive client per Streamlit server process,
+    instead of a new TCP connection for every query.
+    """
+    return RecommenderClient(BASE_URL, timeout=10)
 
 
 # Page Configuration
@@ -30,6 +43,7 @@ Describe what you're looking for in natural language, and I'll find the perfect
 with st.sidebar:
     st.header("⚙️ Settings")
     top_k = st.slider("How many products should be brought?", min_value=1, max_value=10, value=3)
+    diversify = st.toggle("Hide colour variants of the same product", value=False)
     st.info("This system uses **Semantic Search**. It looks at the MEANING of words, not just their letters.")
 
 # --- MAIN SEARCH PART ---
@@ -40,45 +54,45 @@ if search_btn and query:
     with st.spinner('Artificial intelligence scans the wardrobe...'):
         try:
             # Send Request to Backend
-            payload = {"text": query, "top_k": top_k}
-
-            response = requests.post(FULL_API_URL, json=payload, timeout=10)
-
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get("results", [])
-                source = data.get("source", "Unknown")
-
-                if not results:
-                    st.warning("Sorry, I couldn't find anything suitable for this.")
-                else:
-                    if source == "redis_cache":
-                        st.success(f"⚡ Found {len(results)} items (Loaded from Cache 🚀)!")
-                    else:
-                        st.success(f"🐢 Found {len(results)} items (Processed by AI Model 🧠)!")
+            # Only sent when switched on, otherwise the server default (reranking.enabled) applies
+            options = {"diversify": True} if diversify else {}
+            data = get_api_client().recommend(query, top_k=top_k, **options)
 
-                    # List Results
-                    for item in results:
-                        with st.container():
-                            col1, col2 = st.columns([1, 4])
-
-                            details = item.get('details', {})
-
-                            with col1:
-                                st.markdown("# 👗")
-                                st.metric(label="Match Score", value=f"{item.get('score', 0):.4f}")
-
-                            with col2:
-                                st.subheader(item.get('product_name', 'Unknown Product'))
-                                st.caption(
-                                    f"Category: {details.get('product_group_name', '-')} | Type: {details.get('product_type_name', '-')}")
-                                st.write(f"**Description:** {details.get('detail_desc', 'No description available.')}")
-                                st.markdown("---")
+            results = data.get("results", [])
+            source = data.get("source", "Unknown")
 
+            if not results:
+                st.warning("Sorry, I couldn't find anything suitable for this.")
             else:
-                st.error(f"❌ An error occurred! API Code: {response.status_code}")
-                st.error(f"Server Message: {response.text}")
-
-        except requests.exceptions.ConnectionError:
-            st.error(f"🚨 Connection Error! Could not reach: {FULL_API_URL}")
-            st.info("Check if Docker container 'hm_api' is running.")
\ No newline at end of file
+                if source in ("redis_cache", "local_cache"):
+                    st.success(f"⚡ Found {len(results)} items (Loaded from Cache 🚀)!")
+                else:
+                    st.success(f"🐢 Found {len(results)} items (Processed by AI Model 🧠)!")
+
+                # List Results
+                for item in results:
+                    with st.container():
+                        col1, col2 = st.columns([1, 4])
+
+                        details = item.get('details', {})
+
+                        with col1:
+                            st.markdown("# 👗")
+                            # Cosine similarity, or relative BM25 score for exact product name matches
+                            label = "Name Match" if item.get('retrieval') == "lexical" else "Match Score"
+                            st.metric(label=label, value=f"{item.get('score', 0):.4f}")
+
+                        with col2:
+                            st.subheader(item.get('product_name', 'Unknown Product'))
+                            st.caption(
+                                f"Category: {details.get('product_group_name', '-')} | Type: {details.get('product_type_name', '-')}")
+                            st.write(f"**Description:** {details.get('detail_desc', 'No description available.')}")
+                            st.markdown("---")
+
+        except RecommenderAPIError as e:
+            st.error(f"❌ An error occurred! API Code: {e.status_code}")
+            st.error(f"Server Message: {e.message}")
+
+        except httpx.TransportError:
+            st.error(f"🚨 Connection Error! Could not reach: {BASE_URL}")
+            st.info("Check if Docker container 'hm_api' is running.")
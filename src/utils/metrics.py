@@ -0,0 +1,20 @@
+from prometheus_client import Histogram
+
+# Exposed on /metrics together with the Instrumentator's HTTP metrics.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# End-to-end search latency per retrieval path: 'lexical', 'hybrid' or 'dense'
+SEARCH_PATH_LATENCY = Histogram(
+    "search_path_latency_seconds",
+    "Latency of search_products by retrieval path",
+    ["path"],
+    buckets=LATENCY_BUCKETS
+)
+
+# Latency of the individual stages: 'lexical', 'encode', 'dense', 'fusion', 'rerank'
+SEARCH_STAGE_LATENCY = Histogram(
+    "search_stage_latency_seconds",
+    "Latency of the individual search stages",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
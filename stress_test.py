@@ -1,9 +1,10 @@
-import requests
 import random
 import time
 import sys
 
-URL = "http://localhost:8001/recommend"
+from src.client.api_client import RecommenderClient, RecommenderAPIError
+
+BASE_URL = "http://localhost:8001"
 
 search_terms = [
     "black dress", "blue jeans", "summer t-shirt", "leather jacket",
@@ -16,22 +17,22 @@ def send_traffic():
     print("🚀 Traffic Generator Started!")
     counter = 0
 
+    # The local cache is disabled so every request actually reaches the API.
+    client = RecommenderClient(BASE_URL, cache_size=0)
+
     while True:
         try:
             query = random.choice(search_terms)
             k = random.randint(3, 10)
 
-            payload = {"text": query, "top_k": k}
-
             start_time = time.time()
-            response = requests.post(URL, json=payload)
-            latency = (time.time() - start_time) * 1000
-
-            if response.status_code == 200:
-                source = response.json().get('source', 'unknown')
+            try:
+                data = client.recommend(query, top_k=k)
+                latency = (time.time() - start_time) * 1000
+                source = data.get('source', 'unknown')
                 print(f"[{counter}] ✅ '{query}' ({latency:.1f}ms) -> {source}")
-            else:
-                print(f"[{counter}] ❌ Status: {response.status_code}")
+            except RecommenderAPIError as e:
+                print(f"[{counter}] ❌ Status: {e.status_code}")
 
             counter += 1
             time.sleep(random.uniform(0.1, 1.0))
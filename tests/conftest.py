@@ -2,11 +2,27 @@ import sys
 import os
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.api.app import app
+from src.utils.common import read_config
+
+# 1. Isolated Lexical Index
+@pytest.fixture(autouse=True)
+def isolated_lexical_index(tmp_path):
+    """
+    Points lexical.index_path at an empty temporary directory, so an index built by
+    the Ingestion Pipeline in the working tree never changes which search path a test takes.
+    """
+    def read_test_config(config_path="config/config.yaml"):
+        config = read_config(config_path)
+        config.setdefault('lexical', {})['index_path'] = str(tmp_path / "lexical_index.npz")
+        return config
+
+    with patch("src.pipelines.inference_pipeline.read_config", side_effect=read_test_config):
+        yield tmp_path / "lexical_index.npz"
 
 # 2. Test Client Fixture
 @pytest.fixture
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 
 def test_home_endpoint(client):
@@ -44,4 +44,80 @@ def test_recommend_endpoint_invalid_input(client):
     payload = {"text": "a", "top_k": 5}
     response = client.post("/recommend", json=payload)
 
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_recommend_batch_endpoint(client):
+    """
+    Test: POST /recommend/batch
+    Scenario: Client sends several searches in one request.
+    Expected: 200 OK, one response per request, in the same order.
+    """
+    with patch("src.api.app.ml_pipeline") as mock_pipeline, patch("src.api.app.redis_client", None):
+        mock_pipeline.encode_queries.return_value = [[0.1], [0.2]]
+        mock_pipeline.search_products.side_effect = lambda text, top_k, **options: [
+            {"product_name": text, "score": 0.9}
+        ]
+
+        payload = {"requests": [{"text": "Red dress", "top_k": 3}, {"text": "Blue jeans", "top_k": 3}]}
+        response = client.post("/recommend/batch", json=payload)
+
+        assert response.status_code == 200
+        assert "max-age" in response.headers["Cache-Control"]
+        data = response.json()
+        assert data["count"] == 2
+        assert data["responses"][0]["results"][0]["product_name"] == "Red dress"
+        assert data["responses"][1]["results"][0]["product_name"] == "Blue jeans"
+        # Both cache misses are encoded in one call
+        mock_pipeline.encode_queries.assert_called_once_with(["Red dress", "Blue jeans"])
+        assert mock_pipeline.search_products.call_args.kwargs["query_vector"] == [0.2]
+
+
+def test_recommend_cache_hit_sends_remaining_ttl(client):
+    """
+    Test: POST /recommend (Redis cache hit)
+    Expected: Cache-Control max-age is the key's remaining TTL, not the full hour.
+    """
+    mock_redis = MagicMock()
+    cached = '{"results": [{"product_name": "Mock Dress", "score": 0.99}], "source": "redis_cache", "count": 1}'
+    mock_redis.pipeline.return_value.execute.return_value = [cached, 42]
+
+    with patch("src.api.app.ml_pipeline") as mock_pipeline, patch("src.api.app.redis_client", mock_redis):
+        response = client.post("/recommend", json={"text": "Red dress", "top_k": 3})
+
+        assert response.status_code == 200
+        assert response.json()["source"] == "redis_cache"
+        assert response.headers["Cache-Control"] == "max-age=42"
+        mock_pipeline.search_products.assert_not_called()
+
+
+def test_recommend_batch_skips_encoder_for_fast_path(client):
+    """
+    Test: POST /recommend/batch
+    Scenario: One query is an exact product name (lexical fast path).
+    Expected: Only the other query is encoded.
+    """
+    with patch("src.api.app.ml_pipeline") as mock_pipeline, patch("src.api.app.redis_client", None):
+        mock_pipeline.needs_encoder.side_effect = lambda text: text != "Tigra"
+        mock_pipeline.encode_queries.return_value = [[0.2]]
+        mock_pipeline.search_products.side_effect = lambda text, top_k, **options: [
+            {"product_name": text, "score": 0.9}
+        ]
+
+        payload = {"requests": [{"text": "Tigra", "top_k": 3}, {"text": "Blue jeans", "top_k": 3}]}
+        response = client.post("/recommend/batch", json=payload)
+
+        assert response.status_code == 200
+        mock_pipeline.encode_queries.assert_called_once_with(["Blue jeans"])
+        vectors = [call.kwargs["query_vector"] for call in mock_pipeline.search_products.call_args_list]
+        assert vectors == [None, [0.2]]
+
+
+def test_recommend_endpoint_pipeline_not_ready(client):
+    """
+    Test: POST /recommend (Model not loaded yet)
+    Expected: 503 Service Unavailable so clients can retry.
+    """
+    with patch("src.api.app.ml_pipeline", None):
+        response = client.post("/recommend", json={"text": "Red dress", "top_k": 3})
+
+        assert response.status_code == 503
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import httpx
+import pytest
+from unittest.mock import patch
+
+from src.client.api_client import RecommenderClient, AsyncRecommenderClient, RecommenderAPIError
+
+
+def make_transport(responses, calls):
+    """
+    Returns a fake transport that answers with the given (status, body, headers) tuples in order
+    and records every request it receives.
+    """
+    responses = iter(responses)
+
+    def handler(request):
+        calls.append(request)
+        status, body, headers = next(responses)
+        return httpx.Response(status, json=body, headers=headers)
+
+    return httpx.MockTransport(handler)
+
+
+RESULT = {"results": [{"product_name": "Mock Dress", "score": 0.99}], "source": "vector_db", "count": 1}
+
+
+def test_client_uses_local_cache_with_server_ttl():
+    """
+    Test: A second identical query is answered from the local cache.
+    """
+    calls = []
+    transport = make_transport([(200, RESULT, {"Cache-Control": "max-age=60"})], calls)
+
+    with RecommenderClient(transport=transport) as client:
+        first = client.recommend("Red Dress", top_k=3)
+        second = client.recommend("  red dress ", top_k=3)
+
+    assert len(calls) == 1
+    assert first["source"] == "vector_db"
+    assert second["source"] == "local_cache"
+    assert second["results"] == RESULT["results"]
+
+
+def test_client_does_not_cache_without_ttl_hint():
+    calls = []
+    transport = make_transport([(200, RESULT, {}), (200, RESULT, {})], calls)
+
+    with RecommenderClient(transport=transport) as client:
+        client.recommend("Red dress")
+        client.recommend("Red dress")
+
+    assert len(calls) == 2
+
+
+@patch("src.client.api_client.time.sleep")
+def test_client_retries_on_503(mock_sleep):
+    """
+    Test: 503 responses are retried with backoff, other errors are raised.
+    """
+    calls = []
+    transport = make_transport([(503, {"detail": "loading"}, {}), (200, RESULT, {})], calls)
+
+    with RecommenderClient(transport=transport, max_retries=2) as client:
+        data = client.recommend("Red dress")
+
+    assert len(calls) == 2
+    assert mock_sleep.call_count == 1
+    assert data["count"] == 1
+
+    transport = make_transport([(500, {"detail": "boom"}, {})], calls)
+    with RecommenderClient(transport=transport) as client:
+        with pytest.raises(RecommenderAPIError) as exc_info:
+            client.recommend("Red dress")
+    assert exc_info.value.status_code == 500
+
+
+def test_client_batch_keeps_query_order():
+    calls = []
+    batch_body = {"responses": [RESULT, {"results": [], "source": "vector_db", "count": 0}], "count": 2}
+    transport = make_transport([(200, batch_body, {"Cache-Control": "max-age=60"})], calls)
+
+    with RecommenderClient(transport=transport) as client:
+        responses = client.recommend_batch(["Red dress", "Nothing"], top_k=3)
+
+    assert len(calls) == 1
+    assert calls[0].url.path == "/recommend/batch"
+    assert responses[0]["count"] == 1
+    assert responses[1]["count"] == 0
+
+
+def test_async_client_coalesces_concurrent_calls():
+    """
+    Test: Concurrent recommend() calls are merged into a single batch request.
+    """
+    calls = []
+    batch_body = {"responses": [RESULT, RESULT, RESULT], "count": 3}
+    transport = make_transport([(200, batch_body, {})], calls)
+
+    async def run():
+        async with AsyncRecommenderClient(transport=transport, coalesce=True) as client:
+            return await asyncio.gather(
+                client.recommend("Red dress"),
+                client.recommend("Blue jeans"),
+                client.recommend("Gym wear"),
+            )
+
+    responses = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert calls[0].url.path == "/recommend/batch"
+    assert len(json.loads(calls[0].content)["requests"]) == 3
+    assert len(responses) == 3
+
+
+def test_async_client_close_waits_for_in_flight_batches():
+    """
+    Test: aclose() waits for coalesced batches that are already being sent
+    before closing the connection pool.
+    """
+    events = []
+
+    async def slow_handler(request):
+        await asyncio.sleep(0.05)
+        events.append("batch_done")
+        return httpx.Response(200, json=RESULT)
+
+    async def run():
+        client = AsyncRecommenderClient(transport=httpx.MockTransport(slow_handler), coalesce=True)
+        http_aclose = client._http.aclose
+
+        async def tracking_aclose():
+            events.append("pool_closed")
+            await http_aclose()
+
+        client._http.aclose = tracking_aclose
+        task = asyncio.create_task(client.recommend("Red dress"))
+        await asyncio.sleep(0.02)  # coalescing window passed, request in flight
+        await client.aclose()
+        return await task
+
+    assert asyncio.run(run())["count"] == 1
+    assert events == ["batch_done", "pool_closed"]
+
+
+def test_async_client_isolates_invalid_coalesced_call():
+    """
+    Test: A 422 for the coalesced batch is retried per call, so only the invalid
+    call fails and the others still get their results.
+    """
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        body = json.loads(request.content)
+        if request.url.path == "/recommend/batch":
+            return httpx.Response(422, json={"detail": "validation error"})
+        if len(body["text"]) < 2:
+            return httpx.Response(422, json={"detail": "text too short"})
+        return httpx.Response(200, json=RESULT)
+
+    async def run():
+        async with AsyncRecommenderClient(transport=httpx.MockTransport(handler), coalesce=True) as client:
+            return await asyncio.gather(
+                client.recommend("Red dress"),
+                client.recommend("x"),
+                client.recommend("Blue jeans"),
+                return_exceptions=True,
+            )
+
+    first, invalid, last = asyncio.run(run())
+
+    assert [c.url.path for c in calls].count("/recommend/batch") == 1
+    assert first["count"] == 1 and last["count"] == 1
+    assert isinstance(invalid, RecommenderAPIError) and invalid.status_code == 422
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from src.pipelines.evaluation_pipeline import exact_top_k, recall_at_k, ndcg_at_k, pareto_front
+
+
+def test_exact_top_k_matches_full_sort():
+    """
+    Test: Chunked brute-force top-k equals a full sort of the similarity matrix.
+    """
+    rng = np.random.default_rng(0)
+    docs = rng.standard_normal((50, 8)).astype(np.float32)
+    docs /= np.linalg.norm(docs, axis=1, keepdims=True)
+    queries = docs[:7] + 0.01
+
+    indices, scores = exact_top_k(queries, docs, k=5, chunk_size=3)
+
+    expected = np.argsort(-(queries @ docs.T), axis=1)[:, :5]
+    assert np.array_equal(indices, expected)
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_recall_and_ndcg():
+    relevant = np.array([[1, 2, 3], [4, 5, 6]])
+    retrieved = np.array([[3, 2, 1], [4, 9, -1]])
+
+    assert np.allclose(recall_at_k(retrieved, relevant), [1.0, 1 / 3])
+
+    ideal = np.array([[0.9, 0.8, 0.7]])
+    assert np.allclose(ndcg_at_k(ideal, ideal), [1.0])
+    assert ndcg_at_k(np.array([[0.7, 0.8, 0.9]]), ideal)[0] < 1.0
+
+
+def test_pareto_front():
+    results = pd.DataFrame({
+        "recall@k": [0.80, 0.90, 0.85, 0.99],
+        "p95_ms":   [1.0, 2.0, 3.0, 5.0],
+    })
+
+    # 0.85 @ 3ms is dominated by 0.90 @ 2ms
+    assert pareto_front(results).tolist() == [True, True, False, True]
+
+
+def test_load_queries_from_app_log(tmp_path):
+    """
+    Test: Only the "recommend" lines of the API log are used as queries.
+    """
+    from src.pipelines.evaluation_pipeline import EvaluationPipeline
+
+    log_file = tmp_path / "app.log"
+    log_file.write_text(
+        '{"message": "recommend", "query": "red dress", "cache": "miss"}\n'
+        '{"message": "search", "query": "red dress", "path": "dense"}\n'
+        '{"message": "Model and Qdrant DB Ready!"}\n'
+        '{"message": "recommend", "query": "blue jeans", "cache": "hit"}\n'
+    )
+
+    evaluator = EvaluationPipeline.__new__(EvaluationPipeline)
+    assert evaluator.load_queries([], str(log_file)) == ["red dress", "blue jeans"]
+
+
+def test_run_evaluation_fails_clearly_without_queries(tmp_path):
+    """
+    Test: A query log without "recommend" lines (sampled out / freshly rotated) is reported
+    with the file name and sampling rate instead of a ZeroDivisionError.
+    """
+    import pytest
+    from unittest.mock import MagicMock
+    from src.pipelines.evaluation_pipeline import EvaluationPipeline
+
+    log_file = tmp_path / "app.log"
+    log_file.write_text('{"message": "search", "query": "red dress", "path": "dense"}\n')
+
+    evaluator = EvaluationPipeline.__new__(EvaluationPipeline)
+    evaluator.config = {"logging": {"sampling": {"INFO": 0.1}}}
+    evaluator.eval_config = {"k": 10}
+    evaluator.load_collection = MagicMock(return_value=(np.array([1]), np.ones((1, 3), dtype=np.float32), [{}]))
+
+    with pytest.raises(ValueError, match=r"app\.log.*10%"):
+        evaluator.run_evaluation(query_file=str(log_file))
@@ -0,0 +1,80 @@
+import numpy as np
+from src.components.lexical_index import LexicalIndex, tokenize, reciprocal_rank_fusion
+
+
+def build_index():
+    ids = [108775015, 108775044, 110065001, 111565001]
+    names = ["Strap top", "Strap top", "Jade HW Skinny Denim", "Tigra"]
+    descriptions = [
+        "Jersey top with narrow shoulder straps.",
+        "Jersey top with narrow shoulder straps.",
+        "High-waisted jeans in washed superstretch denim.",
+        "Microfibre T-shirt bra with underwired, moulded cups.",
+    ]
+    return LexicalIndex.build(ids, names, descriptions)
+
+
+def test_tokenize():
+    assert tokenize("Jade HW Skinny-Denim!") == ["jade", "hw", "skinny", "denim"]
+
+
+def test_bm25_search_ranks_matching_documents():
+    """
+    Test: BM25 search returns only documents containing the query terms, best first.
+    """
+    index = build_index()
+
+    ids, scores = index.search(tokenize("skinny denim jeans"), limit=3)
+
+    assert ids.tolist() == [110065001]
+    assert scores[0] > 0
+
+
+def test_exact_name_matches():
+    index = build_index()
+
+    ids, scores = index.exact_name_matches(tokenize("tigra"), limit=5)
+    assert ids.tolist() == [111565001]
+    assert scores.tolist() == [1.0]
+    assert sorted(index.exact_name_matches(tokenize("Strap Top"), limit=5)[0].tolist()) == [108775015, 108775044]
+    assert len(index.exact_name_matches(tokenize("strap"), limit=5)[0]) == 0
+
+
+def test_exact_name_match_confidence_gates():
+    """
+    Test: Names shared by several products or made of common words are not confident matches.
+    """
+    index = LexicalIndex.build(
+        [108775015, 108775044, 110065001, 111565001],
+        ["Strap top", "Strap top", "Strap top", "Tigra"],
+        ["Jersey top", "Jersey top", "Vest top", "Soft bra"],
+    )
+
+    # "Strap top" is used by 2 different product codes (108775 and 110065)
+    assert len(index.exact_name_matches(tokenize("strap top"), limit=5, max_products=1)[0]) == 0
+    assert len(index.exact_name_matches(tokenize("strap top"), limit=5, max_products=2)[0]) == 3
+
+    # "top" appears in most documents, "tigra" in one
+    assert len(index.exact_name_matches(tokenize("strap top"), limit=5, min_idf=0.5)[0]) == 0
+    assert len(index.exact_name_matches(tokenize("tigra"), limit=5, min_idf=0.5)[0]) == 1
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    index = build_index()
+    path = str(tmp_path / "lexical_index.npz")
+
+    index.save(path)
+    loaded = LexicalIndex.load(path)
+
+    query = tokenize("jersey straps")
+    assert np.allclose(loaded.score(query), index.score(query))
+    assert loaded.exact_name_matches(tokenize("tigra"), limit=5)[0].tolist() == [111565001]
+    assert loaded.doc_product_codes.tolist() == index.doc_product_codes.tolist()
+
+
+def test_reciprocal_rank_fusion():
+    ids, scores = reciprocal_rank_fusion([[1, 2, 3], [2, 4]], k=60)
+
+    assert ids[0] == 2
+    assert set(ids) == {1, 2, 3, 4}
+    assert scores[0] <= 1.0
@@ -0,0 +1,98 @@
+import json
+import logging
+import queue
+import pytest
+from unittest.mock import patch
+
+from src.utils.logger import (JsonFormatter, SamplingFilter, RequestContextFilter, NonFormattingQueueHandler,
+                              parse_sampling_rates, request_id_var)
+
+
+def make_record(level=logging.INFO, **extra):
+    record = logging.makeLogRecord({"name": "HM_Fashion_Logger.request", "levelno": level,
+                                    "levelname": logging.getLevelName(level), "msg": "search"})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_request_id_and_extra_fields():
+    """
+    Test: Records are rendered as one JSON object with the request id and 'extra=' fields.
+    """
+    record = make_record(request_id="abc123", timings_ms={"encode": 4.2})
+
+    data = json.loads(JsonFormatter().format(record))
+
+    assert data["message"] == "search"
+    assert data["level"] == "INFO"
+    assert data["request_id"] == "abc123"
+    assert data["timings_ms"] == {"encode": 4.2}
+
+
+def test_exception_is_formatted_by_listener():
+    """
+    Test: exc_info survives the queue, so the JSON record has a separate 'exception' key
+    instead of the traceback being pasted into 'message'.
+    """
+    log_queue = queue.SimpleQueue()
+    test_logger = logging.getLogger("test_exception_is_formatted_by_listener")
+    test_logger.propagate = False
+    test_logger.addHandler(NonFormattingQueueHandler(log_queue))
+
+    try:
+        raise ValueError("boom")
+    except ValueError as e:
+        test_logger.error("Error during search: %s", e, exc_info=True)
+
+    record = log_queue.get_nowait()
+    assert record.exc_info is not None
+
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "Error during search: boom"
+    assert "ValueError: boom" in data["exception"]
+    assert "Traceback" not in data["message"]
+
+
+def test_request_context_filter_reads_context_variable():
+    token = request_id_var.set("req-1")
+    record = make_record()
+    RequestContextFilter().filter(record)
+    request_id_var.reset(token)
+
+    assert record.request_id == "req-1"
+
+
+def test_sampling_filter_per_level():
+    """
+    Test: INFO is sampled, WARNING (no rate) is always kept, a rate of 0 drops everything.
+    """
+    sampler = SamplingFilter({logging.INFO: 0.1, logging.DEBUG: 0.0})
+
+    kept = sum(sampler.filter(make_record(request_id=f"{i:032x}")) for i in range(2000))
+
+    assert 100 < kept < 300
+    assert sampler.filter(make_record(level=logging.WARNING))
+    assert not sampler.filter(make_record(level=logging.DEBUG))
+    # The decision is stable for a given request id
+    assert sampler.filter(make_record(request_id="same")) == sampler.filter(make_record(request_id="same"))
+
+
+def test_sampling_rates_accept_any_case_and_reject_unknown_levels():
+    assert parse_sampling_rates({"info": 0.1, "DEBUG": 0.0}) == {logging.INFO: 0.1, logging.DEBUG: 0.0}
+    with pytest.raises(ValueError, match="verbose"):
+        parse_sampling_rates({"verbose": 0.5})
+
+
+def test_request_id_header(client):
+    """
+    Test: The API echoes the caller's X-Request-ID (or generates one).
+    """
+    with patch("src.api.app.ml_pipeline") as mock_pipeline:
+        mock_pipeline.search_products.return_value = []
+
+        response = client.post("/recommend", json={"text": "Red dress", "top_k": 3},
+                               headers={"X-Request-ID": "trace-42"})
+        assert response.headers["X-Request-ID"] == "trace-42"
+
+        response = client.post("/recommend", json={"text": "Red dress", "top_k": 3})
+        assert len(response.headers["X-Request-ID"]) == 32
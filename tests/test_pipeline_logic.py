@@ -1,6 +1,8 @@
+import os
 import pytest
 from unittest.mock import patch, MagicMock
 from src.pipelines.inference_pipeline import InferencePipeline
+from src.components.lexical_index import LexicalIndex
 
 
 @patch("src.pipelines.inference_pipeline.QdrantClient")
@@ -48,4 +50,181 @@ def test_search_logic(mock_sentence_transformer, mock_qdrant_client):
     # 3. Assertions
     assert len(results) == 1
     assert results[0]["product_name"] == "Test Item"
-    assert results[0]["score"] == 0.88
\ No newline at end of file
+    assert results[0]["score"] == 0.88
+
+@patch("src.pipelines.inference_pipeline.QdrantClient")
+@patch("src.pipelines.inference_pipeline.SentenceTransformer")
+def test_search_with_diversity_reranking(mock_sentence_transformer, mock_qdrant_client):
+    """
+    Test: Diversity Re-Ranking
+    Purpose: Are candidates over-fetched with vectors and colour variants collapsed?
+    """
+    pipeline = InferencePipeline()
+
+    mock_vector = MagicMock()
+    mock_vector.tolist.return_value = [0.1, 0.2, 0.3]
+    pipeline.encoder.encode.return_value = mock_vector
+
+    # Two colour variants of the same product (108775) and one other product.
+    hits = []
+    for article_id, score, vector in [(108775015, 0.90, [1.0, 0.0]),
+                                      (108775044, 0.89, [0.99, 0.01]),
+                                      (110065001, 0.60, [0.0, 1.0])]:
+        hit = MagicMock()
+        hit.id = article_id
+        hit.score = score
+        hit.vector = vector
+        hit.payload = {"prod_name": f"Item {article_id}"}
+        hits.append(hit)
+    pipeline.client.search.return_value = hits
+
+    results = pipeline.search_products("jeans", top_k=2, diversify=True, oversample=3)
+
+    call_kwargs = pipeline.client.search.call_args.kwargs
+    assert call_kwargs["limit"] == 6
+    assert call_kwargs["with_vectors"] is True
+    assert [r["product_name"] for r in results] == ["Item 108775015", "Item 110065001"]
+
+
+@patch("src.pipelines.inference_pipeline.QdrantClient")
+@patch("src.pipelines.inference_pipeline.SentenceTransformer")
+def test_lexical_fast_path_skips_encoder(mock_sentence_transformer, mock_qdrant_client):
+    """
+    Test: Lexical Fast Path
+    Purpose: Is an exact product name answered from the BM25 index without encoding?
+    """
+    pipeline = InferencePipeline()
+    pipeline.lexical_index = LexicalIndex.build([111565001], ["Tigra"], ["Microfibre T-shirt bra"])
+    # A one-document corpus has no meaningful IDF
+    pipeline.lexical_config["fast_path_min_idf"] = None
+
+    record = MagicMock()
+    record.id = 111565001
+    record.payload = {"prod_name": "Tigra"}
+    record.vector = None
+    pipeline.client.retrieve.return_value = [record]
+
+    results = pipeline.search_products("Tigra", top_k=3)
+
+    pipeline.encoder.encode.assert_not_called()
+    pipeline.client.search.assert_not_called()
+    assert [r["product_name"] for r in results] == ["Tigra"]
+
+
+@patch("src.pipelines.inference_pipeline.QdrantClient")
+@patch("src.pipelines.inference_pipeline.SentenceTransformer")
+def test_hybrid_search_fuses_dense_and_lexical(mock_sentence_transformer, mock_qdrant_client):
+    """
+    Test: Hybrid Search
+    Purpose: Are BM25-only candidates fetched from Qdrant and fused with the dense hits?
+    """
+    pipeline = InferencePipeline()
+    pipeline.lexical_index = LexicalIndex.build(
+        [1, 2], ["Denim Jacket", "Leather Jacket"], ["Jacket in denim", "Jacket in leather"]
+    )
+
+    mock_vector = MagicMock()
+    mock_vector.tolist.return_value = [0.1, 0.2, 0.3]
+    pipeline.encoder.encode.return_value = mock_vector
+
+    dense_hit = MagicMock()
+    dense_hit.id = 3
+    dense_hit.score = 0.8
+    dense_hit.payload = {"prod_name": "Biker Jacket"}
+    dense_hit.vector = None
+    pipeline.client.search.return_value = [dense_hit]
+
+    records = []
+    for article_id, name, vector in [(1, "Denim Jacket", [0.3, 0.2, 0.1]), (2, "Leather Jacket", [0.2, 0.4, 0.6])]:
+        record = MagicMock()
+        record.id = article_id
+        record.payload = {"prod_name": name}
+        record.vector = vector
+        records.append(record)
+    pipeline.client.retrieve.return_value = records
+
+    results = pipeline.search_products("black leather jacket", top_k=2)
+
+    pipeline.encoder.encode.assert_called_once()
+    assert sorted(pipeline.client.retrieve.call_args.kwargs["ids"]) == [1, 2]
+    assert {r["product_name"] for r in results} == {"Biker Jacket", "Leather Jacket"}
+
+    # 'score' stays a cosine similarity; the RRF value is reported separately
+    scores = {r["product_name"]: r["score"] for r in results}
+    assert scores["Biker Jacket"] == 0.8
+    assert scores["Leather Jacket"] == pytest.approx(1.0)
+    assert all(r["retrieval"] == "hybrid" and 0 < r["fused_score"] <= 1 for r in results)
+
+
+@patch("src.pipelines.inference_pipeline.QdrantClient")
+@patch("src.pipelines.inference_pipeline.SentenceTransformer")
+def test_lexical_fast_path_falls_through(mock_sentence_transformer, mock_qdrant_client):
+    """
+    Test: Lexical Fast Path Fallback
+    Purpose: Generic names (shared by several products) and stale indexes (ids missing
+    from Qdrant) go through the normal encoder + Qdrant path instead.
+    """
+    pipeline = InferencePipeline()
+    pipeline.lexical_config.update({"fast_path_min_idf": None, "fast_path_max_products": 1, "hybrid": False})
+    pipeline.lexical_index = LexicalIndex.build(
+        [108775015, 110065001, 111565001], ["Strap top", "Strap top", "Tigra"], ["", "", ""]
+    )
+
+    mock_vector = MagicMock()
+    mock_vector.tolist.return_value = [0.1, 0.2, 0.3]
+    pipeline.encoder.encode.return_value = mock_vector
+
+    dense_hit = MagicMock()
+    dense_hit.score = 0.8
+    dense_hit.payload = {"prod_name": "Dense Result"}
+    pipeline.client.search.return_value = [dense_hit]
+
+    # 1. "Strap top" maps to 2 product codes -> not confident
+    results = pipeline.search_products("strap top", top_k=3)
+    pipeline.client.retrieve.assert_not_called()
+    assert [r["product_name"] for r in results] == ["Dense Result"]
+
+    # 2. "Tigra" is confident, but Qdrant no longer has the article (stale index)
+    pipeline.client.retrieve.return_value = []
+    results = pipeline.search_products("tigra", top_k=3)
+    pipeline.client.retrieve.assert_called_once()
+    assert [r["product_name"] for r in results] == ["Dense Result"]
+    assert pipeline.encoder.encode.call_count == 2
+
+
+@patch("src.pipelines.inference_pipeline.QdrantClient")
+@patch("src.pipelines.inference_pipeline.SentenceTransformer")
+def test_lexical_index_reloads_when_file_changes(mock_sentence_transformer, mock_qdrant_client,
+                                                 isolated_lexical_index):
+    """
+    Test: Lexical Index Reload
+    Purpose: An index written after startup (or rewritten) is picked up without a restart.
+    """
+    pipeline = InferencePipeline()
+    assert pipeline.lexical_index_path == str(isolated_lexical_index)
+    assert pipeline.lexical_index is None
+
+    LexicalIndex.build([111565001], ["Tigra"], [""]).save(pipeline.lexical_index_path)
+    pipeline.refresh_lexical_index(force=True)
+    assert pipeline.lexical_index.n_docs == 1
+
+    LexicalIndex.build([1, 2], ["A", "B"], ["", ""]).save(pipeline.lexical_index_path)
+    os.utime(pipeline.lexical_index_path, (0, pipeline.lexical_index_mtime + 10))
+    pipeline.refresh_lexical_index(force=True)
+    assert pipeline.lexical_index.n_docs == 2
+
+
+@patch("src.pipelines.inference_pipeline.QdrantClient")
+@patch("src.pipelines.inference_pipeline.SentenceTransformer")
+def test_needs_encoder(mock_sentence_transformer, mock_qdrant_client):
+    """
+    Test: Batch Encoding Check
+    Purpose: Only queries that cannot take the lexical fast path need the encoder.
+    """
+    pipeline = InferencePipeline()
+    assert pipeline.needs_encoder("Tigra")
+
+    pipeline.lexical_index = LexicalIndex.build([111565001], ["Tigra"], [""])
+    pipeline.lexical_config["fast_path_min_idf"] = None
+    assert not pipeline.needs_encoder("tigra")
+    assert pipeline.needs_encoder("black leather jacket")
@@ -0,0 +1,41 @@
+import numpy as np
+from src.components.reranking import product_codes, collapse_variants, mmr_rerank
+
+
+def test_product_codes_from_article_ids():
+    """
+    Test: Colour variants (same article_id prefix) map to the same product code.
+    """
+    ids = [108775015, 108775044, 110065001]
+    payloads = [{}, {}, {"product_code": 110065}]
+
+    codes = product_codes(ids, payloads)
+
+    assert codes.tolist() == [108775, 108775, 110065]
+
+
+def test_collapse_variants_keeps_best_per_product():
+    codes = np.array([7, 3, 7, 5, 3])
+
+    keep = collapse_variants(codes)
+
+    assert keep.tolist() == [0, 1, 3]
+
+
+def test_mmr_prefers_diverse_candidates():
+    """
+    Test: With a near-duplicate of the top hit, MMR picks the different item second.
+    """
+    vectors = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]])
+    relevance = np.array([0.9, 0.89, 0.6])
+
+    assert mmr_rerank(vectors, relevance, k=2, diversity_lambda=0.5) == [0, 2]
+    # lambda = 1.0 is plain relevance order
+    assert mmr_rerank(vectors, relevance, k=2, diversity_lambda=1.0) == [0, 1]
+
+
+def test_mmr_falls_back_to_relevance_when_over_budget():
+    vectors = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]])
+    relevance = np.array([0.9, 0.89, 0.6])
+
+    assert mmr_rerank(vectors, relevance, k=3, diversity_lambda=0.5, budget_ms=0) == [0, 1, 2]